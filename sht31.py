@@ -1,6 +1,24 @@
+import errno
+import math
+import struct
 import time
 import smbus # pylint: disable=import-error
 
+try:
+    from fastcrc import crc8 as _fastcrc8
+except ImportError:
+    _fastcrc8 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 DEVICE_ADDRESS              = (0x44, 0x45) # Alt. 0x45
 
 # (MSB, LOW, MED, HIGH)
@@ -49,7 +67,125 @@ CLOCK_STRETCH_ENABLE        = 1
 CHECK_CRC_ENABLE            = True
 CHECK_CRC_DISABLE           = False
 
+# Scale factors between raw 16-bit readings and their units (section 4.13 of
+# the datasheet), folded so each conversion is a single multiply.
+_RAW_TO_RH                  = 100.0 / 65535.0
+_RH_TO_RAW                  = 65535.0 / 100.0
+_RAW_TO_F                   = 315.0 / 65535.0
+_F_TO_RAW                   = 65535.0 / 315.0
+_RAW_TO_C                   = 175.0 / 65535.0
+_C_TO_RAW                   = 65535.0 / 175.0
+
+# A measurement frame: temperature word, CRC, humidity word, CRC.
+_FRAME                      = struct.Struct('>HBHB')
+# An alert limit: packed humidity/temperature word, CRC.
+_ALERT                      = struct.Struct('>HB')
+_WORD                       = struct.Struct('>H')
+
+# Seconds a status read is reused for, so checking several flags in a row
+# costs a single i2c round-trip.
+_STATUS_TTL                 = 0.002
+_STATUS_EXPIRED             = (0, -math.inf)
+
+# Seconds between periodic measurements, indexed by PERIODIC_MPS*. These are
+# calculated using the mps values given in section 4.5 of the datasheet.
+_PERIODIC_WAIT              = (2, 1, 0.5, 0.25, 0.1)
+
+def _prebuilt(cmd: tuple):
+    """Splits a (MSB, LSB) command into the (cmd, payload) write arguments."""
+
+    return (cmd[0], [cmd[1]])
+
+# Prebuilt commands so i2c writes don't allocate a payload per call. The mode
+# tables are indexed the same way as SINGLE_MODE and PERIODIC_MODE.
+_SINGLE_CMD                 = tuple(tuple(_prebuilt((m[0], lsb)) for lsb in m)
+                                    for m in SINGLE_MODE)
+_PERIODIC_CMD               = tuple(tuple(_prebuilt((m[0], lsb)) for lsb in m)
+                                    for m in PERIODIC_MODE)
+_PERIODIC_FETCH             = _prebuilt(PERIODIC_FETCH)
+_PERIODIC_BREAK             = _prebuilt(PERIODIC_BREAK)
+_SOFT_RESET                 = _prebuilt(SOFT_RESET)
+_CLEAR_STATUS               = _prebuilt(CLEAR_STATUS)
+_HEATER_ON                  = _prebuilt(HEATER_ON)
+_HEATER_OFF                 = _prebuilt(HEATER_OFF)
+_STATUS                     = _prebuilt(STATUS)
+_ALERT_HIGH_RSET            = _prebuilt(ALERT_HIGH_RSET)
+_ALERT_HIGH_RCLEAR          = _prebuilt(ALERT_HIGH_RCLEAR)
+_ALERT_LOW_RSET             = _prebuilt(ALERT_LOW_RSET)
+_ALERT_LOW_RCLEAR           = _prebuilt(ALERT_LOW_RCLEAR)
+
+# https://github.com/ralf1070/Adafruit_Python_SHT31/
+def _crc8_entry(crc: int):
+    polynomial = 0x31
+
+    for i in range(8, 0, -1):
+        if crc & 0x80:
+            crc = (crc << 1) ^ polynomial
+        else:
+            crc = (crc << 1)
+
+    return crc & 0xFF
+
+# Lookup table for the CRC-8 polynomial 0x31 so each byte costs one index.
+_CRC8_TABLE                 = bytes(_crc8_entry(i) for i in range(256))
+
+def _crc8_table(blocks, _table=_CRC8_TABLE):
+    crc = 0xFF
+
+    for block in blocks:
+        crc = _table[crc ^ block]
+
+    return crc
+
+# CRC-8/NRSC-5 is the Sensirion CRC (polynomial 0x31, init 0xFF). Prefer the
+# native fastcrc implementation when it is installed.
+if _fastcrc8 is not None:
+    def _crc8(blocks):
+        return _fastcrc8.nrsc_5(bytes(blocks))
+else:
+    _crc8 = _crc8_table
+
+def _verify_frame(frame, _table=_CRC8_TABLE):
+    """Checks both CRCs of a measurement frame, returns (temp ok, humd ok)."""
+
+    temp_crc = _table[_table[0xFF ^ frame[0]] ^ frame[1]]
+    humd_crc = _table[_table[0xFF ^ frame[3]] ^ frame[4]]
+
+    return (temp_crc == frame[2], humd_crc == frame[5])
+
+if np is not None:
+    _CRC8_ARRAY             = np.frombuffer(_CRC8_TABLE, dtype=np.uint8)
+
+# Below this many frames the numba call overhead outweighs the fused loop.
+_NUMBA_MIN_FRAMES           = 4
+
+if njit is not None:
+    @njit(cache=True)
+    def _crc8_valid(frames, table, col):
+        """Checks the CRC of the word starting at col in every frame."""
+
+        valid = np.empty(frames.shape[0], dtype=np.bool_)
+
+        for i in range(frames.shape[0]):
+            crc = table[table[0xFF ^ frames[i, col]] ^ frames[i, col + 1]]
+            valid[i] = crc == frames[i, col + 2]
+
+        return valid
+else:
+    _crc8_valid = None
+
+def _is_nack(code: OSError):
+    """True if an i2c error is the device not acknowledging (EREMOTEIO)."""
+
+    # smbus-cffi raises IOError(errno) without setting the errno attribute.
+    return code.errno == errno.EREMOTEIO or \
+        code.args[:1] == (errno.EREMOTEIO,)
+
 class SHT31(object):
+    __slots__ = ('_bus', '_dev', '_periodic_next', '_periodic_wait', '_period',
+        '_status_cache', '_periodic_mode', '_periodic_interval',
+        '_repeatability', '_clock_stretch', '_rd_block', '_wr_block')
+
     def __init__(self, dev: int=DEVICE_ADDRESS[0], bus: int=1):
         """
         Args:
@@ -60,12 +196,20 @@ class SHT31(object):
                 data.
             _periodic_next: a timestamp used for syncing periodic fetches with 
                 measurements.
+            _period: the periodic wait plus the repeatability measurement
+                time, used for the first fetch deadline and for resyncing.
+            _status_cache: the last status word and when it was read.
         """
 
         self._bus = smbus.SMBus(bus)
         self._dev = dev
+        self._rd_block = self._bus.read_i2c_block_data
+        self._wr_block = self._bus.write_i2c_block_data
         self._periodic_next = None
         self._periodic_wait = None
+        self._period = None
+        self._status_cache = _STATUS_EXPIRED
+        self._periodic_mode = False
 
         self.repeatability = REPEATABILITY_HIGH
         self.clock_stretch = False
@@ -73,12 +217,12 @@ class SHT31(object):
 
     @property
     def single_shot(self):
-        self._write_block(SINGLE_MODE[self.clock_stretch][0],
-            [SINGLE_MODE[self.clock_stretch][self.repeatability]])
+        cmd = _SINGLE_CMD[self.clock_stretch][self.repeatability]
+        self._write_block(*cmd)
 
         time.sleep(TIMING[self.repeatability])
 
-        block = self._read_block(SINGLE_MODE[self.clock_stretch][0], 6)
+        block = self._read_block(cmd[0], 6)
 
         return self._process_data(block)
 
@@ -89,22 +233,21 @@ class SHT31(object):
         enabled. If False, it is disabled.
         """
 
-        try:
-            return self.__periodic_mode
-        except AttributeError:
-            return False
+        return self._periodic_mode
 
     @periodic_mode.setter
     def periodic_mode(self, val: bool):
         if val:
-            self._write_block(PERIODIC_MODE[self.periodic_interval][0],
-                [PERIODIC_MODE[self.periodic_interval][self.repeatability]])
-            self._periodic_next = time.time() + self._periodic_wait + \
-                TIMING[self.repeatability]
+            self._write_block(
+                *_PERIODIC_CMD[self.periodic_interval][self.repeatability])
+            self._periodic_next = time.monotonic() + self._period
         else:
-            self._write_block(PERIODIC_BREAK[0], [PERIODIC_BREAK[1]])
+            # The device finishes the ongoing measurement before stopping,
+            # which takes up to the repeatability measurement time.
+            self._write_block(*_PERIODIC_BREAK,
+                settle=TIMING[self.repeatability])
         
-        self.__periodic_mode = val
+        self._periodic_mode = val
 
     @property
     def periodic_interval(self):
@@ -119,60 +262,84 @@ class SHT31(object):
             * 10 mps: PERIODIC_MPS10 or 4
         """
 
-        return self.__periodic_interval
+        return self._periodic_interval
 
     @periodic_interval.setter
     def periodic_interval(self, val: int):
         if val >= 0 and val <= 4:
-
-            # These wait times are calculated using the mps values given in
-            # section 4.5 of the datasheet.  For example, 10 mps would enable
-            # a periodic fetch 10 times every second. You then add the 
-            # repeatability measurement time.
-            if val == 4:
-                self._periodic_wait = 0.1
-            elif val == 3:
-                self._periodic_wait = 0.25
-            elif val == 2:
-                self._periodic_wait = 0.5
-            elif val == 1:
-                self._periodic_wait = 1
-            else:
-                self._periodic_wait = 2
-
-            self.__periodic_interval = val
+            # For example, 10 mps would enable a periodic fetch 10 times every
+            # second. You then add the repeatability measurement time.
+            self._periodic_wait = _PERIODIC_WAIT[val]
+            self._periodic_interval = val
+            self._update_period()
 
     @property
     def periodic_fetch(self):
-        curr = time.time()
-        
-        if self._periodic_next > curr:
-            time.sleep(self._periodic_next - curr)
+        return self._process_data(self.periodic_fetch_raw)
+
+    @property
+    def periodic_fetch_raw(self):
+        """
+        Fetches the next periodic measurement without converting it. Returns
+        the 6 byte frame (temperature word, CRC, humidity word, CRC) as bytes.
+        Concatenated frames can be converted with process_batch.
+        """
+
+        delay = self._periodic_next - time.monotonic()
 
-        self._write_block(PERIODIC_FETCH[0], [PERIODIC_FETCH[1]])
-        block = self._read_block(SINGLE_MODE[self.clock_stretch][0], 6)
+        # Schedule from the previous timestamp so the sleep overhead doesn't
+        # accumulate. The sensor measures every periodic wait, the measurement
+        # time offset is only applied once. If the caller fell behind, resync
+        # instead of bursting.
+        if delay > 0:
+            time.sleep(delay)
+            self._periodic_next += self._periodic_wait
+        else:
+            self._periodic_next = time.monotonic() + self._period
 
-        self._periodic_next = time.time() + self._periodic_wait + \
-            TIMING[self.repeatability]
+        cmd = SINGLE_MODE[self.clock_stretch][0]
+        give_up = None
 
-        return self._process_data(block)
+        # The device NACKs a fetch when no new measurement is ready, which
+        # happens when its clock runs slower than the schedule. Poll until the
+        # measurement lands, then realign the schedule to it.
+        while True:
+            self._write_block(*_PERIODIC_FETCH)
+
+            try:
+                block = self._read_block(cmd, 6)
+            except OSError as code:
+                now = time.monotonic()
+
+                if not _is_nack(code) or (give_up and now > give_up):
+                    raise
+
+                give_up = give_up or now + self._period
+                time.sleep(TIMING[0])
+                continue
+
+            if give_up:
+                self._periodic_next = time.monotonic() + self._period
+
+            return block
 
     @property
     def repeatability(self):
-        return self.__repeatability
+        return self._repeatability
 
     @repeatability.setter
     def repeatability(self, val: int):
         if val >= 1 and val <= 3:
-            self.__repeatability = val
+            self._repeatability = val
+            self._update_period()
 
     @property
     def clock_stretch(self):
-        return self.__clock_stretch
+        return self._clock_stretch
 
     @clock_stretch.setter
     def clock_stretch(self, val: bool):
-        self.__clock_stretch = int(val)
+        self._clock_stretch = int(val)
 
     @property
     def heater(self):
@@ -181,13 +348,13 @@ class SHT31(object):
     @heater.setter
     def heater(self, val: bool):
         if val:
-            self._write_block(HEATER_ON[0], [HEATER_ON[1]])
+            self._write_block(*_HEATER_ON, settle=TIMING[0])
         else:
-            self._write_block(HEATER_OFF[0], [HEATER_OFF[1]])
+            self._write_block(*_HEATER_OFF, settle=TIMING[0])
 
     @property
     def high_alert_set(self):
-        return self._read_alert_data(ALERT_HIGH_RSET)
+        return self._read_alert_data(_ALERT_HIGH_RSET)
 
     @high_alert_set.setter
     def high_alert_set(self, val: tuple):
@@ -195,7 +362,7 @@ class SHT31(object):
 
     @property
     def high_alert_clear(self):
-        return self._read_alert_data(ALERT_HIGH_RCLEAR)
+        return self._read_alert_data(_ALERT_HIGH_RCLEAR)
 
     @high_alert_clear.setter
     def high_alert_clear(self, val: tuple):
@@ -203,7 +370,7 @@ class SHT31(object):
 
     @property
     def low_alert_set(self):
-        return self._read_alert_data(ALERT_LOW_RSET)
+        return self._read_alert_data(_ALERT_LOW_RSET)
 
     @low_alert_set.setter
     def low_alert_set(self, val: tuple):
@@ -211,7 +378,7 @@ class SHT31(object):
 
     @property
     def low_alert_clear(self):
-        return self._read_alert_data(ALERT_LOW_RCLEAR)
+        return self._read_alert_data(_ALERT_LOW_RCLEAR)
 
     @low_alert_clear.setter
     def low_alert_clear(self, val: tuple):
@@ -219,13 +386,13 @@ class SHT31(object):
 
     # https://github.com/closedcube/ClosedCube_SHT31D_Arduino
     def _read_alert_data(self, cmd: tuple):
-        self._write_block(cmd[0], [cmd[1]])
-        b1, b2, crc = self._read_block(cmd[0], 3)
+        self._write_block(*cmd)
+        block = self._read_block(cmd[0], 3)
+        data, crc = _ALERT.unpack(block)
 
-        if self.crc8((b1, b2)) != crc:
+        if self.crc8(block[0:2]) != crc:
             return (None, None)
 
-        data = self.merge_blocks(b1, b2)
         humd = data & 0xFE00
         temp = (data & 0x01FF) << 7
 
@@ -236,11 +403,9 @@ class SHT31(object):
         temp = self.from_fahrenheit(val[0])
         data = (humd & 0xFE00) | ((temp >> 7) & 0x01FF)
 
-        b1 = data >> 8
-        b2 = data & 0xFF
-        crc = self.crc8([b1, b2])
+        block = _WORD.pack(data)
 
-        self._write_block(cmd[0], [cmd[1], b1, b2, crc])
+        self._write_block(cmd[0], [cmd[1], *block, self.crc8(block)])
 
     @property
     def is_crc_error(self):
@@ -268,37 +433,103 @@ class SHT31(object):
 
     @property
     def _status(self):
-        self._write_block(STATUS[0], [STATUS[1]])
-        status = self._read_block(0, 2)
+        status, stamp = self._status_cache
+
+        if time.monotonic() - stamp < _STATUS_TTL:
+            return status
+
+        return self.refresh_status()
+
+    def refresh_status(self):
+        """Reads the status register, bypassing the cached status word."""
 
-        return self.merge_blocks(status[0], status[1])
+        self._write_block(*_STATUS)
+        block = self._read_block(0, 2)
+        status = int.from_bytes(block, 'big')
+
+        self._status_cache = (status, time.monotonic())
+
+        return status
 
     def reset(self):
-        self._write_block(SOFT_RESET[0], [SOFT_RESET[1]])
+        self._write_block(*_SOFT_RESET, settle=TIMING[0])
 
     def clear_status(self):
-        self._write_block(CLEAR_STATUS[0], [CLEAR_STATUS[1]])
+        self._write_block(*_CLEAR_STATUS)
+
+    def _process_data(self, data: bytes):
+        temp, _, humd, _ = _FRAME.unpack(data)
+        temp_ok, humd_ok = _verify_frame(data)
+
+        temp = self.to_fahrenheit(temp) if temp_ok else None
+        humd = self.to_relative(humd) if humd_ok else None
+
+        return (temp, humd)
+
+    @staticmethod
+    def process_batch(raw: bytes):
+        """
+        Converts many measurement frames at once, for example frames collected
+        from periodic_fetch_raw and joined with b''.join(). Requires numpy.
+
+        Args:
+            raw: concatenated 6 byte frames as returned by periodic_fetch_raw.
+        Returns:
+            A tuple of numpy arrays: (fahrenheit, relative humidity). Values
+            that fail the CRC check are set to NaN.
+        Raises:
+            RuntimeError: if numpy is not installed.
+            ValueError: if raw is not a whole number of frames.
+        """
 
-    def _process_data(self, data: list):
-        temp = None
-        humd = None
+        if np is None:
+            raise RuntimeError('process_batch requires numpy')
 
-        if self.crc8(data[0:2]) == data[2]:
-            temp = self.merge_blocks(data[0], data[1])
-            temp = self.to_fahrenheit(temp)
+        if len(raw) % _FRAME.size:
+            raise ValueError('raw data is not a whole number of frames')
+
+        frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, _FRAME.size)
+        t1, t2, temp_crc, h1, h2, humd_crc = frames.T
+        table = _CRC8_ARRAY
+
+        temp = SHT31.to_fahrenheit(t1.astype(np.uint16) << 8 | t2)
+        humd = SHT31.to_relative(h1.astype(np.uint16) << 8 | h2)
+
+        # Use the compiled loop when numba is installed, it avoids the
+        # temporary arrays of the vectorized table walk.
+        if _crc8_valid is not None and len(frames) >= _NUMBA_MIN_FRAMES:
+            temp_valid = _crc8_valid(frames, table, 0)
+            humd_valid = _crc8_valid(frames, table, 3)
+        else:
+            temp_valid = table[table[0xFF ^ t1] ^ t2] == temp_crc
+            humd_valid = table[table[0xFF ^ h1] ^ h2] == humd_crc
 
-        if self.crc8(data[3:5]) == data[5]:
-            humd = self.merge_blocks(data[3], data[4])
-            humd = self.to_relative(humd)
+        temp[~temp_valid] = np.nan
+        humd[~humd_valid] = np.nan
 
         return (temp, humd)
 
+    def _update_period(self):
+        if self._periodic_wait is not None:
+            self._period = self._periodic_wait + TIMING[self.repeatability]
+
     def _read_block(self, cmd, num: int=2):
-        return self._bus.read_i2c_block_data(self._dev, cmd, num)
+        return bytes(self._rd_block(self._dev, cmd, num))
+
+    def _write_block(self, cmd, vals: list, settle: float=0.0):
+        """
+        Args:
+            settle: seconds to wait after the write, only needed by commands
+                the device takes time to process.
+        """
+
+        self._wr_block(self._dev, cmd, vals)
 
-    def _write_block(self, cmd, vals: list):
-        self._bus.write_i2c_block_data(self._dev, cmd, vals)
-        time.sleep(TIMING[0])
+        # The command and CRC error bits report on the last write.
+        self._status_cache = _STATUS_EXPIRED
+
+        if settle:
+            time.sleep(settle)
 
     @staticmethod
     def merge_blocks(b1: int, b2: int):
@@ -306,42 +537,26 @@ class SHT31(object):
 
     @staticmethod
     def to_relative(humd: int):
-        return 100.0 * (humd / 65535.0)
+        return humd * _RAW_TO_RH
 
     @staticmethod
     def from_relative(humd: int):
-        return int(humd / 100.0 * 65565.0)
+        return int(humd * _RH_TO_RAW)
 
     @staticmethod
     def to_fahrenheit(temp: int):
-        return -49.0 + 315.0 * (temp / 65535.0)
+        return -49.0 + temp * _RAW_TO_F
 
     @staticmethod
     def from_fahrenheit(temp: int):
-        return int((temp + 49.0) * 13107.0 / 63.0)
+        return int((temp + 49.0) * _F_TO_RAW)
 
     @staticmethod
     def to_celsius(temp: int):
-        return -45.0 + 175.0 * (temp / 65535.0)
+        return -45.0 + temp * _RAW_TO_C
 
     @staticmethod
     def from_celsius(temp: float):
-        return int((temp + 45.0) * 13107.0 / 35.0)
+        return int((temp + 45.0) * _C_TO_RAW)
 
-    # https://github.com/ralf1070/Adafruit_Python_SHT31/
-    @staticmethod
-    def crc8(blocks):
-        polynomial = 0x31
-        crc = 0xFF
-  
-        index = 0
-        for index in range(0, len(blocks)):
-            crc ^= blocks[index]
-            for i in range(8, 0, -1):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ polynomial
-                else:
-                    crc = (crc << 1)
-
-        return crc & 0xFF
-        
\ No newline at end of file
+    crc8 = staticmethod(_crc8)
@@ -74,7 +74,23 @@ LUX_COEFB                   = 1.64
 LUX_COEFC                   = 0.59
 LUX_COEFD                   = 0.86
 
+# Gain multipliers and integration times in ms, used for calculating lux.
+_AGAIN_MAP                  = {CONTROL_AGAIN_LOW: 1.0,
+                               CONTROL_AGAIN_MED: 25.0,
+                               CONTROL_AGAIN_HIGH: 428.0,
+                               CONTROL_AGAIN_MAX: 9876.0}
+_ATIME_MAP                  = {CONTROL_ATIME_100MS: 100.0,
+                               CONTROL_ATIME_200MS: 200.0,
+                               CONTROL_ATIME_300MS: 300.0,
+                               CONTROL_ATIME_400MS: 400.0,
+                               CONTROL_ATIME_500MS: 500.0,
+                               CONTROL_ATIME_600MS: 600.0}
+
 class TSL2591(object):
+    __slots__ = ('_bus', '_dev', '_aien', '_npien', '_sai', '_next', '_wait',
+        '_again', '_atime', '_gain_reg', '_atime_reg', '_maxc', '_cpl',
+        'saturated', '_rd_byte', '_rd_block', '_wr_byte', '_wr_word')
+
     def __init__(self, dev=DEVICE_ADDRESS, bus=1, interrupt=False,
         np_interrupt=False, sleep_after=False):
         """
@@ -93,6 +109,14 @@ class TSL2591(object):
             _next: a timestamp used for syncing data access with data cycles.
             _again: used for calculating lux.
             _atime: used for calculating lux.
+            _gain_reg: the gain bits last written to the control register.
+            _atime_reg: the integration time bits last written to the control
+                register.
+            _maxc: the saturation count for the integration time.
+            _cpl: counts per lux, derived from _atime and _again.
+
+        The underscored settings are cached from the control register by
+        _load_control whenever it is written or the device is reset.
             saturated: True if sensor is saturated, False if not.
         Raises:
             RuntimeError: if device ID does not match or can not be obtained.
@@ -100,6 +124,10 @@ class TSL2591(object):
 
         self._bus = smbus.SMBus(bus)
         self._dev = dev
+        self._rd_byte = self._bus.read_byte_data
+        self._rd_block = self._bus.read_i2c_block_data
+        self._wr_byte = self._bus.write_byte_data
+        self._wr_word = self._bus.write_word_data
         self._aien = interrupt
         self._npien = np_interrupt
         self._sai = sleep_after
@@ -111,7 +139,7 @@ class TSL2591(object):
         self.gain = CONTROL_AGAIN_LOW
         self.saturated = False
 
-        self._next = time.time() + self._wait
+        self._next = time.monotonic() + self._wait
         
     def on(self):
         """Turns the sensor on, does not control power to device."""
@@ -121,14 +149,16 @@ class TSL2591(object):
         enable |= ENABLE_NPIEN if self._npien else False
         enable |= ENABLE_SAI if self._sai else False
 
-        self._write_byte(REGISTER_ENABLE, ENABLE_POWERON | ENABLE_AEN)
         self._write_byte(REGISTER_ENABLE, ENABLE_POWERON | ENABLE_AEN | enable)
         self.clear_interrupt() # Must clear interrupt if not reset
 
-        while not self.is_valid:
+        dev = self._dev
+        status = COMMAND_NORMAL | REGISTER_STATUS
+
+        while not self._rd_byte(dev, status) & STATUS_AVALID:
             time.sleep(self._wait)
 
-        self._next = time.time() + self._wait
+        self._next = time.monotonic() + self._wait
 
     def off(self):
         """Turns the sensor off, does not control power to device."""
@@ -168,29 +198,23 @@ class TSL2591(object):
         Higher settings will easily saturate the sensor and should only be used
         in special cases.
         
-        The device defaults to medium, but low is the default for this driver 
+        The device powers up at low, which is also the default for this driver
         and is recommended for normal light conditions.
+
+        This driver is the only writer of the control register, so the value
+        last written is returned without reading the device.
         """
         
-        return self._read_byte(REGISTER_CONTROL) & 0x30
+        return self._gain_reg
 
     @gain.setter
     def gain(self, val):
-        valid = (CONTROL_AGAIN_LOW, CONTROL_AGAIN_MED, CONTROL_AGAIN_HIGH,
-            CONTROL_AGAIN_MAX)
-
-        if val in valid:
-            if (val == CONTROL_AGAIN_LOW):
-                self._again = 1.0
-            elif (val == CONTROL_AGAIN_MED):
-                self._again = 25.0
-            elif (val == CONTROL_AGAIN_HIGH):
-                self._again = 428.0
-            elif (val == CONTROL_AGAIN_MAX):
-                self._again = 9876.0
-
-            cur = self._read_byte(REGISTER_CONTROL) & 0xCF
-            self._write_byte(REGISTER_CONTROL, cur | val)
+        if val not in _AGAIN_MAP:
+            return
+
+        control = (self._read_byte(REGISTER_CONTROL) & 0xCF) | val
+        self._write_byte(REGISTER_CONTROL, control)
+        self._load_control(control)
 
     @property
     def time(self):
@@ -208,35 +232,26 @@ class TSL2591(object):
         settings will easily saturate the sensor and should only be used in
         special cases.
         
-        The device defaults to 200ms, but this driver defaults to 100ms. Both
-        are recommended for normal light conditions.
+        The device powers up at 100ms, which is also the default for this
+        driver and is recommended for normal light conditions.
 
         The maximum count for 100 ms is reduced from 65535 to 36863.  Meaning
         the device will saturate at a lower value than other integration times.
+
+        Like gain, the value last written is returned without reading the
+        device.
         """
 
-        return self._read_byte(REGISTER_CONTROL) & 0x07
+        return self._atime_reg
 
     @time.setter
     def time(self, val):
-        if val >= 0 and val <= 5:
-            if (val == CONTROL_ATIME_100MS):
-                self._atime = 100.0
-            elif (val == CONTROL_ATIME_200MS):
-                self._atime = 200.0
-            elif (val == CONTROL_ATIME_300MS):
-                self._atime = 300.0
-            elif (val == CONTROL_ATIME_400MS):
-                self._atime = 400.0
-            elif (val == CONTROL_ATIME_500MS):
-                self._atime = 500.0
-            elif (val == CONTROL_ATIME_600MS):
-                self._atime = 600.0
-
-            self._wait = self._atime / 100 
-
-            cur = self._read_byte(REGISTER_CONTROL) & 0xF8
-            self._write_byte(REGISTER_CONTROL, cur | val)
+        if val not in _ATIME_MAP:
+            return
+
+        control = (self._read_byte(REGISTER_CONTROL) & 0xF8) | val
+        self._write_byte(REGISTER_CONTROL, control)
+        self._load_control(control)
 
     @property
     def raw_data(self):
@@ -252,20 +267,24 @@ class TSL2591(object):
         infrared value from the full spectrum value.
         """
 
-        curr = time.time()
-
-        if self._next > curr:
-            time.sleep(self._next - curr)
+        delay = self._next - time.monotonic()
 
-        self._next = time.time() + self._wait
+        # Schedule from the previous timestamp so the sleep overhead doesn't
+        # accumulate. If the caller fell behind, resync instead of bursting.
+        if delay > 0:
+            time.sleep(delay)
+            self._next += self._wait
+        else:
+            self._next = time.monotonic() + self._wait
 
-        # Read sequentially starting at lower byte address.
-        ch0 = self._read_word(REGISTER_C0DATAL)
-        ch1 = self._read_word(REGISTER_C1DATAL)
+        # Read both channels in one transaction, the register address
+        # auto-increments from C0DATAL through C1DATAH.
+        data = self._read_block(REGISTER_C0DATAL, 4)
+        ch0 = data[0] | (data[1] << 8)
+        ch1 = data[2] | (data[3] << 8)
 
         # Quick fix to detect saturation
-        maxc = MAX_COUNT_100MS if self.time == 0 else MAX_COUNT
-        self.saturated = True if ch0 > maxc or ch1 > maxc else False
+        self.saturated = max(ch0, ch1) > self._maxc
 
         return (ch0, ch1)
 
@@ -279,7 +298,7 @@ class TSL2591(object):
         """
 
         ch0, ch1 = self.raw_data
-        cpl = (self._atime * self._again) / LUX_DF
+        cpl = self._cpl
 
         # Adafruit's current method for calculating Lux
         # from https://github.com/adafruit/Adafruit_TSL2591_Library
@@ -316,10 +335,10 @@ class TSL2591(object):
         measurement is evaluated.
         """
 
-        l = self._read_word(REGISTER_AILTL)
-        h = self._read_word(REGISTER_AIHTL)
+        # The low and high thresholds are adjacent, read both at once.
+        data = self._read_block(REGISTER_AILTL, 4)
 
-        return (l, h)
+        return (data[0] | (data[1] << 8), data[2] | (data[3] << 8))
 
     @interrupt.setter
     def interrupt(self, val):
@@ -367,10 +386,9 @@ class TSL2591(object):
     def np_interrupt(self):
         """Refer to the interrupt property."""
 
-        l = self._read_word(REGISTER_NPAILTL)
-        h = self._read_word(REGISTER_NPAIHTL)
+        data = self._read_block(REGISTER_NPAILTL, 4)
 
-        return (l, h)
+        return (data[0] | (data[1] << 8), data[2] | (data[3] << 8))
 
     @np_interrupt.setter
     def np_interrupt(self, val) :
@@ -381,13 +399,13 @@ class TSL2591(object):
     def interrupt_enabled(self):
         """A read-only property. True if interrupts are enabled."""
 
-        return bool((self._read_byte(REGISTER_ENABLE) & ENABLE_AIEN) >> 4)
+        return bool(self._read_byte(REGISTER_ENABLE) & ENABLE_AIEN)
 
     @property
     def np_interrupt_enabled(self):
         """A read-only property. True if non-persist interrupts are enabled."""
 
-        return bool((self._read_byte(REGISTER_ENABLE) & ENABLE_NPIEN ) >> 6)
+        return bool(self._read_byte(REGISTER_ENABLE) & ENABLE_NPIEN)
 
     @property
     def sleep_after_enabled(self):
@@ -396,7 +414,7 @@ class TSL2591(object):
         enabled.
         """
 
-        return bool((self._read_byte(REGISTER_ENABLE) & ENABLE_SAI) >> 5)
+        return bool(self._read_byte(REGISTER_ENABLE) & ENABLE_SAI)
 
     @property
     def is_on(self):
@@ -421,7 +439,7 @@ class TSL2591(object):
     def is_interrupt(self):
         """A read-only property. True if an interrupt has been triggered."""
 
-        return bool((self._read_byte(REGISTER_STATUS) & STATUS_AINT) >> 4)
+        return bool(self._read_byte(REGISTER_STATUS) & STATUS_AINT)
 
     # No-persist Interrupt. Indicates that the device has encountered a
     # no-persist interrupt condition.
@@ -432,7 +450,7 @@ class TSL2591(object):
         triggered.
         """
 
-        return bool((self._read_byte(REGISTER_STATUS) & STATUS_NPINTR) >> 5)
+        return bool(self._read_byte(REGISTER_STATUS) & STATUS_NPINTR)
 
     @property
     def is_tsl2591(self):
@@ -454,6 +472,8 @@ class TSL2591(object):
         Clears and resets ALS interrupt but does not reset interrupt thresholds.
         """
 
+        # These can't be merged into a block write, the register address
+        # auto-increments from ENABLE into CONTROL.
         self._write_byte(REGISTER_ENABLE, 3)
         self._write_byte(REGISTER_ENABLE, 19)
         self._read_byte(COMMAND_CLEAR_INT)
@@ -479,14 +499,42 @@ class TSL2591(object):
             else:
                 raise
 
+        # Resync the cached settings with the device. If it is still busy
+        # resetting, the control register powers up as 0x00.
+        try:
+            control = self._read_byte(REGISTER_CONTROL)
+        except OSError:
+            control = 0x00
+
+        self._load_control(control)
+
+    def _load_control(self, control):
+        """Updates the settings cached from the control register value."""
+
+        self._gain_reg = control & 0x30
+        self._atime_reg = control & 0x07
+        self._again = _AGAIN_MAP[self._gain_reg]
+        self._atime = _ATIME_MAP[self._atime_reg]
+        self._wait = self._atime / 100
+        self._maxc = MAX_COUNT_100MS \
+            if self._atime_reg == CONTROL_ATIME_100MS else MAX_COUNT
+        self._cpl = (self._atime * self._again) / LUX_DF
+
     def _read_byte(self, reg):
-        return self._bus.read_byte_data(self._dev, COMMAND_NORMAL | reg)
+        return self._rd_byte(self._dev, COMMAND_NORMAL | reg)
 
     def _read_word(self, reg):
-        return self._bus.read_word_data(self._dev, COMMAND_NORMAL | reg)
+        # A block read guarantees one combined transaction, some kernels
+        # split read_word_data into two byte reads.
+        data = self._read_block(reg, 2)
+
+        return data[0] | (data[1] << 8)
+
+    def _read_block(self, reg, num):
+        return self._rd_block(self._dev, COMMAND_NORMAL | reg, num)
 
     def _write_byte(self, reg, msg):
-        self._bus.write_byte_data(self._dev, COMMAND_NORMAL | reg, msg) 
+        self._wr_byte(self._dev, COMMAND_NORMAL | reg, msg) 
 
     def _write_word(self, reg, msg):
-        self._bus.write_word_data(self._dev, COMMAND_NORMAL | reg, msg)
+        self._wr_word(self._dev, COMMAND_NORMAL | reg, msg)